@@ -6,64 +6,196 @@ trajectories with a Savitzky-Golay filter and converts them to the 16 hinge
 angles defined in :mod:`utils.angle_features`. The resulting arrays are
 saved in half precision (``float16``) to ``output_dir`` using the same
 filenames as the source files.
+
+Clips longer than ``chunk_frames`` are processed out-of-core: the source is
+memory-mapped, smoothed in fixed-size frame blocks (overlap-save with a halo
+of ``window // 2`` frames on each side) and the angles are written
+incrementally to memory-mapped arrays, so peak memory per worker does not
+grow with the recording length.
 """
 from __future__ import annotations
 
-from multiprocessing import Pool
 from pathlib import Path
+import argparse
 import os
 import sys
+import zipfile
 
 sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
 
-from utils.config_loader import load_config, Config
+from adaptive_pool import AdaptiveExecutor, file_size
+from run_journal import TMP_SUFFIX, atomic_path
 
 import numpy as np
-from scipy.signal import savgol_filter
 
 from utils.angle_features import JOINT_LABELS, compute_angles_mp15
 
+# scipy is imported lazily (see :func:`_init_worker`) so that argument parsing
+# and the parent process do not pay for it.
+savgol_filter = None
 
 
-def _process_file(args: tuple[Path, Path, int, int]):
-    src, out_dir, window, order = args
-    data = np.load(src)
-    data = data[:, : len(JOINT_LABELS), :]
+def _init_worker() -> None:
+    """Pool initializer: import scipy once per worker instead of per task."""
+    global savgol_filter
+    if savgol_filter is None:
+        from scipy.signal import savgol_filter as _savgol
+        savgol_filter = _savgol
+
+
+def _smooth_block(data: np.ndarray, window: int, order: int) -> np.ndarray:
+    _init_worker()
     flat = data.reshape(data.shape[0], -1)
     flat = savgol_filter(flat, window_length=window, polyorder=order, axis=0)
-    data = flat.reshape(data.shape)
-    cos,sin = compute_angles_mp15(data)
+    return flat.reshape(data.shape)
+
+
+def _process_chunked(src: Path, dst: Path, window: int, order: int,
+                     chunk_frames: int) -> None:
+    """Smooth and convert ``src`` block by block into ``dst`` (``.npz``).
+
+    Each block of ``chunk_frames`` frames is filtered together with
+    ``window // 2`` halo frames on either side and only the interior is kept,
+    which gives the same result as filtering the whole clip at once (the
+    edge blocks see the true clip boundaries). ``cos``/``sin`` are written to
+    memory-mapped ``.npy.tmp`` scratch files next to ``dst`` and then stored
+    uncompressed into the archive, matching the layout produced by
+    :func:`numpy.savez`. The archive is written via
+    :func:`run_journal.atomic_path`, so a killed worker leaves only ``*.tmp``
+    files behind, never a truncated ``.npz``.
+    """
+    data = np.load(src, mmap_mode='r')
+    n_frames = data.shape[0]
+    n_joints = len(JOINT_LABELS)
+    halo = window // 2
+    # every filtered segment must hold at least one full window
+    chunk_frames = max(chunk_frames, window)
+
+    tmp = {name: dst.with_name(f'{dst.name}.{name}.npy{TMP_SUFFIX}')
+           for name in ('cos', 'sin')}
+    outs = None
+    try:
+        for start in range(0, n_frames, chunk_frames):
+            stop = min(start + chunk_frames, n_frames)
+            lo = max(0, start - halo)
+            hi = min(n_frames, stop + halo)
+            if hi - lo < window:
+                lo = max(0, hi - window)
+            block = np.asarray(data[lo:hi, :n_joints, :])  # keep source dtype, like the in-memory path
+            block = _smooth_block(block, window, order)[start - lo:stop - lo]
+            cos, sin = compute_angles_mp15(block)
+            if outs is None:
+                outs = {
+                    name: np.lib.format.open_memmap(
+                        tmp[name], mode='w+', dtype=arr.dtype,
+                        shape=(n_frames,) + arr.shape[1:])
+                    for name, arr in (('cos', cos), ('sin', sin))
+                }
+            outs['cos'][start:stop] = cos
+            outs['sin'][start:stop] = sin
+        if outs is None:
+            raise ValueError(f'{src.name}: empty clip')
+        for name in outs:
+            outs[name].flush()
+        outs = None
+        with atomic_path(dst) as part:
+            with zipfile.ZipFile(part, 'w', compression=zipfile.ZIP_STORED,
+                                 allowZip64=True) as zf:
+                for name, path in tmp.items():
+                    zf.write(path, arcname=f'{name}.npy')
+    finally:
+        outs = None
+        for path in tmp.values():
+            path.unlink(missing_ok=True)
+
+
+def _process_file(args: tuple[Path, Path, int, int, int | None]):
+    src, out_dir, window, order, chunk_frames = args
     out_dir.mkdir(parents=True, exist_ok=True)
+    if chunk_frames is not None:
+        n_frames = np.load(src, mmap_mode='r').shape[0]
+        if n_frames > chunk_frames:
+            _process_chunked(src, out_dir / f'{src.stem}.npz', window, order,
+                             chunk_frames)
+            return src.name
+    data = np.load(src)
+    data = data[:, : len(JOINT_LABELS), :]
+    data = _smooth_block(data, window, order)
+    cos,sin = compute_angles_mp15(data)
     dst = out_dir / (src.stem)
     np.savez(dst, cos=cos, sin=sin)
     return src.name
 
 
-def convert_directory(src_dir: Path, out_dir: Path, workers: int = 32,
-                      window: int = 9, order: int = 3) -> None:
+def _input_size(args: tuple[Path, Path, int, int, int | None]) -> int:
+    """``size_of`` for the executor: bytes of the clip a worker holds at once.
+
+    A chunked clip only ever has one block (plus halo) in memory, so it is
+    charged for that block rather than for the whole file; this keeps the
+    admission estimate and the learned memory factor on the same scale.
+    """
+    src, _, window, _, chunk_frames = args
+    size = file_size(src)
+    if chunk_frames is None:
+        return size
+    try:
+        data = np.load(src, mmap_mode='r')
+    except (OSError, ValueError):
+        return size
+    if data.ndim == 0 or data.shape[0] <= chunk_frames:
+        return size
+    frame_bytes = data.itemsize * int(np.prod(data.shape[1:]))
+    return min(size, (max(chunk_frames, window) + 2 * (window // 2)) * frame_bytes)
+
+
+def convert_directory(src_dir: Path, out_dir: Path, workers: int | None = None,
+                      window: int = 9, order: int = 3,
+                      chunk_frames: int | None = None) -> None:
+    """Convert every ``.npy`` in ``src_dir``.
+
+    ``workers=None`` lets :class:`adaptive_pool.AdaptiveExecutor` pick the
+    worker count and admit files by estimated memory. Clips with more than
+    ``chunk_frames`` frames are converted out-of-core (see
+    :func:`_process_chunked`); ``None`` loads every clip fully.
+    """
     files = sorted(p for p in src_dir.glob('*.npy'))
-    args = [(p, out_dir, window, order) for p in files]
-    with Pool(processes=workers) as pool:
-        for name in pool.imap_unordered(_process_file, args):
+    # leftovers of a killed run (see _process_chunked), like RunJournal does
+    for stale in out_dir.glob(f'*{TMP_SUFFIX}'):
+        stale.unlink(missing_ok=True)
+    args = [(p, out_dir, window, order, chunk_frames) for p in files]
+    with AdaptiveExecutor(workers=workers, initializer=_init_worker) as exe:
+        for (src, *_), name, err in exe.imap(_process_file, args,
+                                             size_of=_input_size):
+            if err is not None:
+                print(f"Failed {src.name}: {err}")
+                continue
             print(f"Converted {name}")
 
 
-def main() -> None:
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--src_root', type=Path, default=Path("data/raw"))
+    parser.add_argument('--out_root', type=Path, default=Path("data/angles"))
+    parser.add_argument('--subsets', nargs='+', default=['ntu', 'suemd-markless'])
+    parser.add_argument('--window', type=int, default=9)
+    parser.add_argument('--order', type=int, default=3)
+    parser.add_argument('--workers', type=int, default=None,
+                        help='fixed worker count (default: autotuned)')
+    parser.add_argument('--chunk_frames', type=int, default=65536,
+                        help='clips longer than this are converted out-of-core')
+    args = parser.parse_args(argv)
+
+    from utils.config_loader import load_config, Config
     cfg: Config = load_config()
 
-    src_root = Path("data/raw")
-    out_root = Path("data/angles")
-    window = 9
-    order = 3
-    workers = 32
-
-    for sub in ['ntu',  'suemd-markless']:
-        s = src_root / sub
+    for sub in args.subsets:
+        s = args.src_root / sub
         if not s.exists():
             continue
-        o = out_root / sub
+        o = args.out_root / sub
         print(f'Converting {s} -> {o}')
-        convert_directory(s, o, workers, window, order)
+        convert_directory(s, o, args.workers, args.window, args.order,
+                          args.chunk_frames)
 
 
 if __name__ == '__main__':
@@ -0,0 +1,328 @@
+#!/usr/bin/env python3
+"""
+adaptive_pool.py
+
+Process pool that picks its own worker count and admits tasks by memory.
+
+The conversion scripts used to size their pools with fixed guesses
+(32 workers, os.cpu_count()).  AdaptiveExecutor instead:
+
+  * warms up with a quarter of the cores and doubles the number of tasks
+    in flight while the measured throughput (files/s) keeps improving, then
+    stays at the best level;
+  * estimates the memory each task will need as
+        worker_baseline + file_size * factor
+    where `factor` is learned from the peak RSS the workers report, and
+    only admits a task while the estimates of everything in flight fit in
+    the memory budget.  Large files therefore run with fewer neighbours,
+    while small files still fill every core.
+
+Usage:
+    with AdaptiveExecutor() as exe:
+        for item, result, error in exe.imap(fn, items):
+            ...
+"""
+import multiprocessing
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from concurrent.futures.process import BrokenProcessPool
+
+try:
+    import resource
+except ImportError:          # Windows: no peak-RSS reporting, factor stays at default
+    resource = None
+
+# Initial guess of task memory per byte of input, before anything is measured.
+DEFAULT_MEM_FACTOR = 8.0
+# Fraction of the currently available RAM the pool may plan to use.
+MEM_FRACTION = 0.8
+# How far past the head of the queue we look for a task that fits in memory.
+LOOKAHEAD = 64
+# Throughput must improve by this much for a warm-up step to be kept.
+MIN_GAIN = 1.05
+# A task in flight when this many pools died (e.g. OOM kill) is reported as failed.
+MAX_KILLS = 3
+
+# Start-method context used when AdaptiveExecutor gets no mp_context.
+DEFAULT_MP_CONTEXT = None
+
+
+def use_forkserver(preload=()):
+    """
+    Make every later AdaptiveExecutor start workers from one fork server that
+    has already imported `preload`, so each pool (and each worker) skips the
+    interpreter start-up and heavy imports that the spawn method repeats.
+    No-op where forkserver is unavailable (Windows).
+    """
+    global DEFAULT_MP_CONTEXT
+    if 'forkserver' not in multiprocessing.get_all_start_methods():
+        return None
+    ctx = multiprocessing.get_context('forkserver')
+    ctx.set_forkserver_preload(list(preload))
+    DEFAULT_MP_CONTEXT = ctx
+    return ctx
+
+
+def available_memory():
+    """Available physical memory in bytes (MemAvailable on Linux)."""
+    try:
+        with open('/proc/meminfo', 'r') as f:
+            for line in f:
+                if line.startswith('MemAvailable:'):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    try:
+        return os.sysconf('SC_AVPHYS_PAGES') * os.sysconf('SC_PAGE_SIZE')
+    except (ValueError, OSError, AttributeError):
+        return None
+
+
+def file_size(item):
+    """Default size_of: size of the path (or first tuple element), 0 if unknown."""
+    path = item[0] if isinstance(item, tuple) else item
+    try:
+        return os.path.getsize(path)
+    except (OSError, TypeError):
+        return 0
+
+
+def _read_hwm():
+    """VmHWM of this process in bytes, None where /proc is unavailable."""
+    try:
+        with open('/proc/self/status', 'r') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return None
+
+
+def _reset_hwm():
+    """Reset VmHWM to the current RSS (Linux); False if not supported."""
+    try:
+        with open('/proc/self/clear_refs', 'w') as f:
+            f.write('5')
+        return True
+    except OSError:
+        return False
+
+
+def _max_rss():
+    if resource is None:
+        return 0
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss if os.uname().sysname == 'Darwin' else rss * 1024
+
+
+def _measured_call(fn, item):
+    """
+    Run fn(item) in the worker and report (result, peak_rss, elapsed), where
+    peak_rss is the high-water mark of this task only.  Workers are reused, so
+    the lifetime peak (ru_maxrss) would charge a small file with the memory of
+    an earlier large one.  Where the high-water mark cannot be reset, the peak
+    is reported only if this task raised it, else 0 (nothing learned).
+    """
+    hwm_reset = _reset_hwm()
+    before = _max_rss()
+    t0 = time.perf_counter()
+    result = fn(item)
+    elapsed = time.perf_counter() - t0
+    peak = _read_hwm() if hwm_reset else None
+    if peak is None:
+        after = _max_rss()
+        peak = after if after > before else 0
+    return result, peak, elapsed
+
+
+class AdaptiveExecutor:
+    """
+    ProcessPoolExecutor wrapper with throughput-based worker autotuning and
+    memory-aware admission control.
+
+    max_workers: upper bound on processes (default os.cpu_count()).
+    initializer: run once per worker, e.g. to import heavy modules up front.
+    workers:     fixed number of tasks in flight; None → autotune.
+    mem_budget:  bytes the pool may plan to use; None → MEM_FRACTION of the
+                 available memory at start-up.
+    """
+
+    def __init__(self, max_workers=None, workers=None, mem_budget=None,
+                 mem_factor=DEFAULT_MEM_FACTOR, mp_context=None,
+                 initializer=None, initargs=()):
+        self.max_workers = max_workers or workers or os.cpu_count() or 4
+        self.workers = workers
+        if mem_budget is None:
+            avail = available_memory()
+            mem_budget = int(avail * MEM_FRACTION) if avail else None
+        self.mem_budget = mem_budget
+        self.mem_factor = mem_factor
+        self.baseline = None        # smallest peak RSS seen ≈ idle worker
+        self._limit = workers       # tasks in flight right now
+        self._pool_args = dict(max_workers=self.max_workers,
+                               mp_context=mp_context or DEFAULT_MP_CONTEXT,
+                               initializer=initializer, initargs=initargs)
+        self._exe = ProcessPoolExecutor(**self._pool_args)
+
+    @property
+    def concurrency(self):
+        """Tasks in flight: the settled worker count, or the current warm-up level."""
+        return self.workers if self.workers is not None else self._limit
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.shutdown()
+
+    def shutdown(self, wait=True):
+        self._exe.shutdown(wait=wait)
+
+    # -- memory model -------------------------------------------------------
+
+    def estimate(self, size):
+        return (self.baseline or 0) + size * self.mem_factor
+
+    def _learn(self, size, peak):
+        if not peak:
+            return
+        if self.baseline is None or peak < self.baseline:
+            self.baseline = peak
+        if size <= 0:
+            return
+        ratio = max(0.0, (peak - self.baseline) / size)
+        # grow immediately (avoid OOM), decay slowly (regain throughput)
+        if ratio > self.mem_factor:
+            self.mem_factor = ratio
+        else:
+            self.mem_factor = 0.8 * self.mem_factor + 0.2 * ratio
+
+    # -- recovery -------------------------------------------------------------
+
+    def _recover(self):
+        """
+        A worker died (most likely OOM-killed) and took the pool with it:
+        start a fresh pool, double the memory factor and halve the tasks in
+        flight, so the retried tasks get more room.
+        """
+        self._exe.shutdown(wait=False, cancel_futures=True)
+        self._exe = ProcessPoolExecutor(**self._pool_args)
+        self.mem_factor *= 2
+        self.workers = max(1, (self._limit or 1) // 2)
+        self._limit = self.workers
+        return self.workers
+
+    # -- scheduling ---------------------------------------------------------
+
+    def _warmup_levels(self):
+        levels = []
+        n = max(1, self.max_workers // 4)
+        while n < self.max_workers:
+            levels.append(n)
+            n *= 2
+        levels.append(self.max_workers)
+        return levels
+
+    def imap(self, fn, items, size_of=file_size):
+        """
+        Run fn over items, yielding (item, result, error) as tasks finish.
+        error is None on success, otherwise the exception raised by fn.  A
+        worker that dies (e.g. OOM-killed) does not end the run: the pool is
+        restarted, the tasks it took down are retried, and a task is reported
+        with BrokenProcessPool once it died alone or MAX_KILLS times.
+        """
+        pending = deque((item, size_of(item)) for item in items)
+        running = {}                # future -> (item, size, estimate)
+        in_flight_mem = 0
+        kills = {}                  # id(item) -> pool breaks it was in flight for
+
+        levels = deque(self._warmup_levels())
+        limit = self.workers if self.workers is not None else levels.popleft()
+        self._limit = limit
+        best_limit, best_rate = limit, 0.0
+        window_done, window_start = 0, time.perf_counter()
+
+        while pending or running:
+            # admit as many tasks as the concurrency and memory budget allow
+            broken = False
+            while pending and len(running) < limit:
+                pick = None
+                for idx in range(min(LOOKAHEAD, len(pending))):
+                    est = self.estimate(pending[idx][1])
+                    if (not running or self.mem_budget is None
+                            or in_flight_mem + est <= self.mem_budget):
+                        pick = idx
+                        break
+                if pick is None:
+                    break
+                try:
+                    fut = self._exe.submit(_measured_call, fn, pending[pick][0])
+                except BrokenProcessPool:
+                    broken = True
+                    break
+                pending.rotate(-pick)
+                item, size = pending.popleft()
+                pending.rotate(pick)
+                running[fut] = (item, size, est)
+                in_flight_mem += est
+
+            done = set()
+            if running and not broken:
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+            lost = []               # tasks taken down by a dead worker
+            for fut in done:
+                item, size, est = running.pop(fut)
+                in_flight_mem -= est
+                try:
+                    result, peak, _ = fut.result()
+                except BrokenProcessPool:
+                    broken = True
+                    lost.append((item, size))
+                    continue
+                except Exception as e:
+                    yield item, None, e
+                else:
+                    self._learn(size, peak)
+                    yield item, result, None
+                window_done += 1
+
+            if broken:
+                # every other task in flight went down with the pool as well
+                for fut, (item, size, _) in running.items():
+                    if fut.done() and not fut.cancelled() and fut.exception() is None:
+                        result, peak, _ = fut.result()
+                        self._learn(size, peak)
+                        yield item, result, None
+                    else:
+                        lost.append((item, size))
+                running.clear()
+                in_flight_mem = 0
+                limit = self._recover()
+                levels.clear()
+                for item, size in reversed(lost):
+                    n = kills[id(item)] = kills.get(id(item), 0) + 1
+                    if len(lost) == 1 or n >= MAX_KILLS:
+                        yield item, None, BrokenProcessPool(
+                            f"worker died while processing this task ({n} time(s))")
+                    else:
+                        pending.appendleft((item, size))    # retry first
+                window_done, window_start = 0, time.perf_counter()
+                continue
+
+            # warm-up: measure files/s over 2*limit completions per level
+            if self.workers is None and window_done >= 2 * limit:
+                rate = window_done / (time.perf_counter() - window_start)
+                if rate >= best_rate * MIN_GAIN:
+                    best_limit, best_rate = limit, rate
+                    if levels:
+                        limit = levels.popleft()
+                    else:
+                        self.workers = limit
+                else:
+                    limit = self.workers = best_limit
+                self._limit = limit
+                window_done, window_start = 0, time.perf_counter()
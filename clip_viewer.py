@@ -0,0 +1,353 @@
+#!/usr/bin/env python3
+"""
+clip_viewer.py
+
+Interactive 3D viewer for (T, 17|15, 3) skeleton clips that stays responsive
+on hour-long recordings and on corpora of tens of thousands of clips.
+
+  * Clips are memory-mapped, either one .npy per clip from a directory or
+    slices of a packed dataset (see pack_clips), so only the frames that are
+    drawn are ever read.
+  * Axis limits come from per-clip min/max statistics computed once with a
+    streaming pass and cached (<dir>/.clip_stats.npz, or stored in the pack
+    index), instead of min/max over flattened copies of the whole clip.
+  * Playback follows the wall clock at --fps and skips frames when drawing
+    cannot keep up; the frame slider moves in steps of T // SCRUB_STEPS.
+  * Clips are switched in place: n / p (next / previous), or type an index or
+    part of a name in the "Clip" box.  A list of neighbouring clips is shown
+    on the right.
+
+Keys: space play/pause, left/right step, n/p next/previous clip.
+
+Usage:
+    python clip_viewer.py emb_suemd_data                      # directory of .npy clips
+    python clip_viewer.py emb_suemd_data --clip S1A1D1R2
+    python clip_viewer.py emb_suemd_data --pack packed/suemd  # write packed/suemd.{data.npy,index.npz}
+    python clip_viewer.py packed/suemd                        # view the packed dataset
+"""
+import argparse
+import os
+import time
+from pathlib import Path
+
+import numpy as np
+
+from run_journal import atomic_path
+from skeleton_topology import get_topology
+
+# Frames per block for the streaming statistics / packing passes.
+CHUNK_FRAMES = 8192
+# The slider has at most this many positions per clip.
+SCRUB_STEPS = 2000
+# Redraw period of the playback timer (ms).
+TIMER_MS = 33
+# Clips listed above and below the current one.
+LIST_CONTEXT = 12
+
+STATS_FILE = '.clip_stats.npz'
+PACK_DATA = '.data.npy'
+PACK_INDEX = '.index.npz'
+
+
+def clip_bounds(x, chunk_frames=CHUNK_FRAMES):
+    """Per-axis (min, max) of a (T, J, 3) array, one block of frames at a time."""
+    lo = np.full(3, np.inf)
+    hi = np.full(3, -np.inf)
+    for start in range(0, x.shape[0], chunk_frames):
+        blk = x[start:start + chunk_frames]
+        lo = np.minimum(lo, blk.min(axis=(0, 1)))
+        hi = np.maximum(hi, blk.max(axis=(0, 1)))
+    return lo, hi
+
+
+def _save_npz(path, **arrays):
+    with atomic_path(path) as tmp:
+        with open(tmp, 'wb') as f:
+            np.savez(f, **arrays)
+
+
+class DirectorySource:
+    """One memory-mapped .npy per clip; bounds cached in <dir>/.clip_stats.npz."""
+
+    def __init__(self, root):
+        self.root = Path(root)
+        self.paths = sorted(self.root.glob('*.npy'))
+        self.names = [p.stem for p in self.paths]
+        self.stats_path = self.root / STATS_FILE
+        self._stats = {}            # name -> (mtime, lo, hi)
+        self._dirty = False
+        if self.stats_path.exists():
+            cached = np.load(self.stats_path)
+            for name, mtime, lo, hi in zip(cached['names'].tolist(), cached['mtimes'],
+                                           cached['mins'], cached['maxs']):
+                self._stats[name] = (float(mtime), lo, hi)
+
+    def __len__(self):
+        return len(self.paths)
+
+    def clip(self, i):
+        return np.load(self.paths[i], mmap_mode='r')
+
+    def bounds(self, i):
+        name, mtime = self.names[i], os.path.getmtime(self.paths[i])
+        cached = self._stats.get(name)
+        if cached is None or cached[0] != mtime:
+            lo, hi = clip_bounds(self.clip(i))
+            self._stats[name] = (mtime, lo, hi)
+            self._dirty = True
+            cached = self._stats[name]
+        return cached[1], cached[2]
+
+    def close(self):
+        if not self._dirty:
+            return
+        names = sorted(self._stats)
+        _save_npz(self.stats_path, names=np.array(names),
+                  mtimes=np.array([self._stats[n][0] for n in names]),
+                  mins=np.array([self._stats[n][1] for n in names]),
+                  maxs=np.array([self._stats[n][2] for n in names]))
+        self._dirty = False
+
+
+class PackedSource:
+    """Clips stored back to back in <prefix>.data.npy, indexed by <prefix>.index.npz."""
+
+    def __init__(self, prefix):
+        prefix = str(prefix)
+        for suffix in (PACK_INDEX, PACK_DATA):
+            if prefix.endswith(suffix):
+                prefix = prefix[:-len(suffix)]
+        self.data = np.load(prefix + PACK_DATA, mmap_mode='r')
+        index = np.load(prefix + PACK_INDEX)
+        self.names = index['names'].tolist()
+        self.offsets = index['offsets']
+        self.mins = index['mins']
+        self.maxs = index['maxs']
+
+    def __len__(self):
+        return len(self.names)
+
+    def clip(self, i):
+        return self.data[self.offsets[i]:self.offsets[i + 1]]
+
+    def bounds(self, i):
+        return self.mins[i], self.maxs[i]
+
+    def close(self):
+        pass
+
+
+def is_pack(path):
+    path = str(path)
+    return path.endswith((PACK_INDEX, PACK_DATA)) or os.path.exists(path + PACK_INDEX)
+
+
+def open_source(path):
+    return PackedSource(path) if is_pack(path) else DirectorySource(path)
+
+
+def pack_clips(src_dir, out_prefix, chunk_frames=CHUNK_FRAMES):
+    """
+    Concatenate every .npy in src_dir into <out_prefix>.data.npy (float32) and
+    write names, frame offsets and per-clip bounds to <out_prefix>.index.npz.
+    Clips are copied block by block, so memory stays bounded.
+    """
+    files = sorted(Path(src_dir).glob('*.npy'))
+    if not files:
+        raise ValueError(f"No .npy files found in {src_dir}")
+    shapes = [np.load(f, mmap_mode='r').shape for f in files]   # headers only
+    n_joints = shapes[0][1]
+    for f, shape in zip(files, shapes):
+        if len(shape) != 3 or shape[1:] != (n_joints, 3):
+            raise ValueError(f"{f.name}: shape {shape}, expected (T, {n_joints}, 3)")
+
+    offsets = np.zeros(len(files) + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum([shape[0] for shape in shapes])
+    mins = np.empty((len(files), 3))
+    maxs = np.empty((len(files), 3))
+
+    Path(out_prefix).parent.mkdir(parents=True, exist_ok=True)
+    with atomic_path(str(out_prefix) + PACK_DATA) as tmp:
+        out = np.lib.format.open_memmap(tmp, mode='w+', dtype=np.float32,
+                                        shape=(int(offsets[-1]), n_joints, 3))
+        for i, f in enumerate(files):
+            x = np.load(f, mmap_mode='r')
+            lo, hi = np.full(3, np.inf), np.full(3, -np.inf)
+            for start in range(0, x.shape[0], chunk_frames):
+                blk = np.asarray(x[start:start + chunk_frames], dtype=np.float32)
+                out[offsets[i] + start:offsets[i] + start + len(blk)] = blk
+                lo = np.minimum(lo, blk.min(axis=(0, 1)))
+                hi = np.maximum(hi, blk.max(axis=(0, 1)))
+            mins[i], maxs[i] = lo, hi
+        out.flush()
+        del out
+    _save_npz(str(out_prefix) + PACK_INDEX, names=np.array([f.stem for f in files]),
+              offsets=offsets, mins=mins, maxs=maxs)
+    return len(files), int(offsets[-1])
+
+
+class ClipViewer:
+    def __init__(self, source, start=0, fps=30.0):
+        # matplotlib is only needed here, not for packing / stats
+        import matplotlib.pyplot as plt
+        from matplotlib.widgets import Slider, TextBox
+        from mpl_toolkits.mplot3d.art3d import Line3DCollection
+
+        self.source = source
+        self.fps = fps
+        self.playing = True
+        self._syncing = False
+
+        self.fig = plt.figure(figsize=(11, 8))
+        self.ax = self.fig.add_axes([0.0, 0.12, 0.72, 0.86], projection='3d')
+        self.ax.set_xlabel("X")
+        self.ax.set_ylabel("Y")
+        self.ax.set_zlabel("Z")
+        self.ax.view_init(elev=20., azim=-70)
+        self.joints, = self.ax.plot([], [], [], 'o', c='blue', ms=4, alpha=0.7)
+        # start with one degenerate segment: add_collection3d autoscales and fails on an
+        # empty collection in matplotlib >= 3.9; load() sets the axis limits afterwards
+        self.bones = Line3DCollection([[(0, 0, 0), (0, 0, 0)]], colors='red', linewidths=1.5)
+        self.ax.add_collection3d(self.bones)
+        self.list_text = self.fig.text(0.74, 0.96, '', va='top', family='monospace', fontsize=8)
+
+        self.slider = Slider(self.fig.add_axes([0.08, 0.04, 0.58, 0.03]), 'Frame', 0, 1,
+                             valinit=0, valfmt='%d')
+        self.slider.on_changed(self._on_scrub)
+        self.box = TextBox(self.fig.add_axes([0.78, 0.035, 0.2, 0.04]), 'Clip ')
+        self.box.on_submit(self._on_jump)
+
+        self.fig.canvas.mpl_connect('key_press_event', self._on_key)
+        self.fig.canvas.mpl_connect('close_event', lambda event: self.source.close())
+        self.timer = self.fig.canvas.new_timer(interval=TIMER_MS)
+        self.timer.add_callback(self._on_tick)
+
+        self.load(start)
+        self.timer.start()
+
+    # -- clip / frame state -------------------------------------------------
+
+    def load(self, i):
+        self.index = i % len(self.source)
+        self.data = self.source.clip(self.index)
+        self.edges = get_topology(self.data.shape[1]).edges
+        self.n_frames = self.data.shape[0]
+        self.stride = max(1, self.n_frames // SCRUB_STEPS)
+
+        lo, hi = self.source.bounds(self.index)
+        half = max(float(np.max(hi - lo)) / 2.0, 1e-6)
+        mid = (np.asarray(hi) + np.asarray(lo)) / 2.0
+        self.ax.set_xlim(mid[0] - half, mid[0] + half)
+        self.ax.set_ylim(mid[1] - half, mid[1] + half)
+        self.ax.set_zlim(mid[2] - half, mid[2] + half)
+
+        self._syncing = True
+        self.slider.valmin, self.slider.valmax = 0, max(self.n_frames - 1, 1)
+        self.slider.valstep = self.stride
+        self.slider.ax.set_xlim(self.slider.valmin, self.slider.valmax)
+        self.slider.set_val(0)
+        self._syncing = False
+
+        names = self.source.names
+        lo_i = max(0, self.index - LIST_CONTEXT)
+        rows = [f"{'>' if j == self.index else ' '} {j:6d} {names[j]}"
+                for j in range(lo_i, min(len(names), self.index + LIST_CONTEXT + 1))]
+        self.list_text.set_text(f"{len(names)} clips\n\n" + "\n".join(rows))
+        self._restart_clock(0)
+        self.show(0)
+
+    def show(self, frame):
+        self.frame = int(min(max(frame, 0), self.n_frames - 1))
+        coords = np.asarray(self.data[self.frame], dtype=np.float32)
+        self.joints.set_data_3d(coords[:, 0], coords[:, 1], coords[:, 2])
+        self.bones.set_segments(coords[self.edges])      # (n_bones, 2, 3) gather
+        self.ax.set_title(f"{self.source.names[self.index]}  frame {self.frame}/{self.n_frames - 1}"
+                          + (f"  (scrub step {self.stride})" if self.stride > 1 else ""))
+        self._syncing = True
+        self.slider.set_val(self.frame - self.frame % self.stride)
+        self._syncing = False
+        self.fig.canvas.draw_idle()
+
+    def _restart_clock(self, frame):
+        self._t0, self._f0 = time.perf_counter(), frame
+
+    # -- callbacks ------------------------------------------------------------
+
+    def _on_tick(self):
+        if not self.playing:
+            return
+        frame = self._f0 + int((time.perf_counter() - self._t0) * self.fps)
+        if frame >= self.n_frames:
+            self._restart_clock(0)
+            frame = 0
+        if frame != self.frame:
+            self.show(frame)
+
+    def _on_scrub(self, val):
+        if self._syncing:
+            return
+        self._restart_clock(int(val))
+        self.show(int(val))
+
+    def _on_jump(self, text):
+        text = text.strip()
+        if not text:
+            return
+        if text.isdigit():
+            self.load(int(text))
+            return
+        for j, name in enumerate(self.source.names):
+            if text in name:
+                self.load(j)
+                return
+        print(f"No clip matching '{text}'")
+
+    def _on_key(self, event):
+        if self.box.capturekeystrokes:
+            return
+        if event.key == ' ':
+            self.playing = not self.playing
+            self._restart_clock(self.frame)
+        elif event.key in ('n', 'pagedown'):
+            self.load(self.index + 1)
+        elif event.key in ('p', 'pageup'):
+            self.load(self.index - 1)
+        elif event.key in ('right', 'left'):
+            self.playing = False
+            self.show(self.frame + (self.stride if event.key == 'right' else -self.stride))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("source", help="Directory of .npy clips, or a packed dataset prefix.")
+    parser.add_argument("--clip", type=str, default=None, help="Start at this clip (index or part of the name).")
+    parser.add_argument("--fps", type=float, default=30.0, help="Playback rate in frames per second.")
+    parser.add_argument("--pack", type=str, default=None,
+                        help="Pack the clips of `source` into <PACK>.data.npy / <PACK>.index.npz and exit.")
+    args = parser.parse_args(argv)
+
+    if args.pack:
+        n_clips, n_frames = pack_clips(args.source, args.pack)
+        print(f"Packed {n_clips} clips ({n_frames} frames) → {args.pack}{PACK_DATA}")
+        return
+
+    source = open_source(args.source)
+    if not len(source):
+        print(f"No clips found in {args.source}")
+        return
+    start = 0
+    if args.clip is not None:
+        start = int(args.clip) if args.clip.isdigit() else next(
+            (j for j, name in enumerate(source.names) if args.clip in name), 0)
+
+    import matplotlib.pyplot as plt
+    viewer = ClipViewer(source, start=start, fps=args.fps)
+    plt.show()
+    source.close()
+    return viewer
+
+
+if __name__ == "__main__":
+    main()
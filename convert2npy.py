@@ -7,82 +7,119 @@ mapping original joint indices to new positions so that “original joint 4”
 ends up in “new index 2,” etc., and preserving the original (x,y,z).
 
 Usage:
-    python parallel_skeleton2npy.py valid_list.txt /output/dir
+    python parallel_skeleton2npy.py valid_list.txt /output/dir [--resume | --retry_failed]
+
+Outputs are written atomically (temp file + rename).  Progress is journaled
+to /output/dir/progress.jsonl and failures to /output/dir/errors.jsonl, so a
+killed run can be continued with --resume, and --retry_failed re-runs only
+the clips that failed last time.
 """
+import argparse
 import os
-import sys
 import numpy as np
-from concurrent.futures import ProcessPoolExecutor, as_completed
 from functools import partial
 
+from adaptive_pool import AdaptiveExecutor
+from run_journal import RunJournal, atomic_path
+
+# NTU17[i] = NTU25[NTU25_TO_NTU17[i]], e.g. original joint 3 (Head) → new idx 2
+from skeleton_topology import N_JOINTS_NTU25, NTU25_TO_NTU17
+
 # Map: original NTU joint index → new index in the 17-joint array
-JOINT_MAP = {
-     3:  2,   # Head           → new idx 2
-     8:  6,   # Right shoulder → new idx 6
-     4:  3,   # Left shoulder  → new idx 3
-    20:  1,   # Spine          → new idx 1
-     5:  4,   # Left elbow     → new idx 4
-     9:  7,   # Right elbow    → new idx 7
-    10:  8,   # Right wrist    → new idx 8
-     7:  5,   # Left hand      → new idx 5
-    16: 13,   # Right hip      → new idx 13
-     0:  0,   # Base spine     → new idx 0
-    12:  9,   # Left hip       → new idx 9
-    17: 14,   # Right knee     → new idx 14
-    13: 10,   # Left knee      → new idx 10
-    19: 16,   # Right foot     → new idx 16
-    18: 15,   # Right ankle    → new idx 15
-    14: 11,   # Left ankle     → new idx 11
-    15: 12,   # Left foot      → new idx 12
-}
-
-
-def convert_one(skel_path, out_dir):
-
-    with open(skel_path, 'r') as f:
-        n_frames = int(f.readline().strip())
-        out = np.zeros((n_frames, len(JOINT_MAP), 3), dtype=np.float32)
-
-        for fi in range(n_frames):
-            _ = f.readline()                   # num_bodies
-            _ = f.readline()                   # body header + lean + trackingState
-            joint_count = int(f.readline().strip())
-
-            for j in range(joint_count):
-                parts = f.readline().split()
-                x, y, z = map(float, parts[:3])
-                if j in JOINT_MAP:
-                    new_idx = JOINT_MAP[j]
-                    out[fi, new_idx, :] = (x, y, z)
-            # skip any remaining joints if joint_count > max key
-            # (but our loop already reads all joint_count lines)
+JOINT_MAP = {int(src): dst for dst, src in enumerate(NTU25_TO_NTU17)}
+
+
+# Frames parsed per block before being written to the output memmap.
+CHUNK_FRAMES = 4096
+
+
+def convert_one(skel_path, out_dir, chunk_frames=CHUNK_FRAMES):
+    """
+    Parse one .skeleton file into <out_dir>/<name>.npy.
 
+    Frames are parsed into a block of `chunk_frames` rows and written
+    incrementally to a memory-mapped output, so memory stays bounded no
+    matter how long the recording is.
+    """
     base      = os.path.splitext(os.path.basename(skel_path))[0]
     out_path  = os.path.join(out_dir, base + '.npy')
-    np.save(out_path, out)
-    return out_path, out.shape
 
-def main(list_file, out_dir, workers=None):
+    with open(skel_path, 'r') as f, atomic_path(out_path) as tmp_path:
+        n_frames = int(f.readline().strip())
+        out = np.lib.format.open_memmap(
+            tmp_path, mode='w+', dtype=np.float32,
+            shape=(n_frames, len(JOINT_MAP), 3))
+        # raw 25-joint block; the 17 kept joints are gathered in one step
+        raw = np.zeros((min(chunk_frames, n_frames), N_JOINTS_NTU25, 3),
+                       dtype=np.float32)
+
+        for start in range(0, n_frames, chunk_frames):
+            stop = min(start + chunk_frames, n_frames)
+            raw[:] = 0
+            for bi in range(stop - start):
+                _ = f.readline()                   # num_bodies
+                _ = f.readline()                   # body header + lean + trackingState
+                joint_count = int(f.readline().strip())
+
+                for j in range(joint_count):
+                    parts = f.readline().split()
+                    if j < N_JOINTS_NTU25:
+                        raw[bi, j, :] = tuple(map(float, parts[:3]))
+                # skip any remaining joints if joint_count > 25
+                # (but our loop already reads all joint_count lines)
+            out[start:stop] = raw[:stop - start, NTU25_TO_NTU17]
+
+        out.flush()
+        shape = out.shape
+        del out                                # close before the rename
+    return out_path, shape
+
+def main(list_file, out_dir, workers=None, resume=False, retry_failed=False):
     os.makedirs(out_dir, exist_ok=True)
     with open(list_file, 'r') as lf:
         paths = [l.strip() for l in lf if l.strip()]
 
-    workers = workers or os.cpu_count() or 4
-    print(f"Converting {len(paths)} files with {workers} workers…")
+    with RunJournal(out_dir) as journal:
+        todo = journal.select(paths, resume=resume, retry_failed=retry_failed)
+        if len(todo) != len(paths):
+            print(f"Skipping {len(paths) - len(todo)} files "
+                  f"({'retry_failed' if retry_failed else 'resume'} mode).")
+
+        # workers=None → autotune the worker count and admit files by memory
+        print(f"Converting {len(todo)} files with "
+              f"{workers or 'auto-tuned'} workers…")
+
+        converter = partial(convert_one, out_dir=out_dir)
+        with AdaptiveExecutor(workers=workers) as exe:
+            for i, (src, result, err) in enumerate(exe.imap(converter, todo), 1):
+                if err is None:
+                    out_path, shape = result
+                    journal.mark_done(src, out_path)
+                    print(f"[{i}/{len(todo)}] {os.path.basename(src)} → {shape}")
+                else:
+                    journal.mark_failed(src, err)
+                    print(f"[ERROR] {src}: {err}")
+            print(f"Settled on {exe.concurrency} workers.")
+
+    n_failed = len(journal.failed())
+    if n_failed:
+        print(f"{n_failed} files failed, see {journal.errors_path}")
 
-    converter = partial(convert_one, out_dir=out_dir)
-    with ProcessPoolExecutor(max_workers=workers) as exe:
-        futures = {exe.submit(converter, p): p for p in paths}
-        for i, fut in enumerate(as_completed(futures), 1):
-            src = futures[fut]
-            try:
-                out_path, shape = fut.result()
-                print(f"[{i}/{len(paths)}] {os.path.basename(src)} → {shape}")
-            except Exception as e:
-                print(f"[ERROR] {src}: {e}")
+def cli(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("list_file", help="text file with one .skeleton path per line")
+    parser.add_argument("out_dir", help="directory for the .npy outputs")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="fixed worker count (default: autotune)")
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument("--resume", action="store_true",
+                      help="skip clips already recorded as done")
+    mode.add_argument("--retry_failed", action="store_true",
+                      help="only re-run clips that failed previously")
+    args = parser.parse_args(argv)
+    main(args.list_file, args.out_dir, args.workers,
+         resume=args.resume, retry_failed=args.retry_failed)
 
 if __name__ == "__main__":
-    if len(sys.argv) != 3:
-        print(__doc__)
-        sys.exit(1)
-    main(sys.argv[1], sys.argv[2])
+    cli()
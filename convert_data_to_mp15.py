@@ -3,10 +3,12 @@
 import numpy as np
 from pathlib import Path
 import argparse
-from tqdm import tqdm
-import multiprocessing # For using multiple cores
 import os # For getting CPU count
 
+from adaptive_pool import AdaptiveExecutor
+from run_journal import RunJournal, atomic_save
+from skeleton_topology import NTU17_TO_MP15
+
 # Import constants for the original NTU 17-joint format
 try:
     from constants_ntu import NTU_17_JOINTS_ORDER, ROW_NTU
@@ -66,8 +68,6 @@ def convert_single_ntu17_file_to_mp15(ntu17_npy_path: Path, output_mp15_dir: Pat
     Converts a single (T, 17, 3) NTU npy file to (T, 15, 3) MP15 format and saves it.
     Returns: (input_path, success_status, error_message_if_any)
     """
-    mapping = get_ntu17_to_mp15_mapping_global() # Get the globally initialized mapping
-
     try:
         ntu17_data = np.load(ntu17_npy_path)
     except Exception as e:
@@ -76,17 +76,13 @@ def convert_single_ntu17_file_to_mp15(ntu17_npy_path: Path, output_mp15_dir: Pat
     if ntu17_data.ndim != 3 or ntu17_data.shape[1] != len(NTU_17_JOINTS_ORDER) or ntu17_data.shape[2] != 3:
         return (ntu17_npy_path, False, f"Unexpected shape {ntu17_data.shape}")
 
-    n_frames = ntu17_data.shape[0]
-    mp15_data = np.zeros((n_frames, N_JOINTS_MP15, 3), dtype=np.float32)
-
-    for mp15_idx, mp15_target_name in enumerate(MP15_SKELETON_ORDER):
-        ntu_source_name = mapping[mp15_target_name]
-        ntu_source_idx = ROW_NTU[ntu_source_name]
-        mp15_data[:, mp15_idx, :] = ntu17_data[:, ntu_source_idx, [0, 2, 1]] / 1000
+    # Single gather with the name-matched joint index (checked against the mapping in main),
+    # then swap Y/Z and convert mm -> m.
+    mp15_data = (ntu17_data[:, NTU17_TO_MP15][:, :, [0, 2, 1]] / 1000).astype(np.float32)
 
     output_file_path = output_mp15_dir / ntu17_npy_path.name
     try:
-        np.save(output_file_path, mp15_data)
+        atomic_save(output_file_path, mp15_data) # temp file + rename, never half-written
         return (ntu17_npy_path, True, None)
     except Exception as e:
         return (ntu17_npy_path, False, f"Error saving {output_file_path}: {e}")
@@ -99,7 +95,7 @@ def worker_process_file(file_path_and_output_dir_tuple):
     return convert_single_ntu17_file_to_mp15(file_path, output_dir)
 
 
-def main():
+def main(argv=None):
     parser = argparse.ArgumentParser(
         description="Convert NTU 17-joint .npy files to MediaPipe-compatible 15-joint .npy files using multiple cores."
     )
@@ -110,9 +106,19 @@ def main():
         "--output_mp15_dir", type=str, required=True, help="Directory to save converted MP15-joint .npy files."
     )
     parser.add_argument(
-        "--num_cores", type=int, default=32, help="Number of CPU cores to use. Defaults to os.cpu_count()."
+        "--num_cores", type=int, default=None,
+        help="Number of CPU cores to use. Defaults to autotuning (up to os.cpu_count()) with memory-aware admission."
+    )
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument(
+        "--resume", action="store_true", help="Skip files already recorded as converted in <output_mp15_dir>/progress.jsonl."
+    )
+    mode.add_argument(
+        "--retry_failed", action="store_true", help="Only re-run files recorded as failed in <output_mp15_dir>/errors.jsonl."
     )
-    args = parser.parse_args()
+    args = parser.parse_args(argv)
+
+    from tqdm import tqdm # imported lazily: not needed for --help or by the workers
 
     ntu17_dir = Path(args.ntu17_dir)
     output_mp15_dir = Path(args.output_mp15_dir)
@@ -122,13 +128,18 @@ def main():
         print(f"Error: Input directory '{ntu17_dir}' does not exist.")
         return
 
-    # Initialize the global mapping ONCE in the main process.
-    # Child processes created by the pool will inherit/re-initialize it via get_ntu17_to_mp15_mapping_global().
+    # Build and validate the mapping ONCE in the main process.
+    # Workers only use the precomputed NTU17_TO_MP15 gather index, which must agree with it.
     try:
         get_ntu17_to_mp15_mapping_global() # Initializes NTU17_TO_MP15_MAPPING
         print("Using the following NTU17 to MP15 mapping (MP15 Target Name <-- NTU Source Name [Original NTU Index]):")
         for mp15_name, ntu_name in NTU17_TO_MP15_MAPPING.items(): # Access the initialized global
             print(f"  MP15 '{mp15_name}' <-- NTU '{ntu_name}' [index {ROW_NTU.get(ntu_name, 'N/A')}]")
+        expected = [ROW_NTU[NTU17_TO_MP15_MAPPING[name]] for name in MP15_SKELETON_ORDER]
+        if NTU17_TO_MP15.tolist() != expected:
+            raise ValueError(
+                f"skeleton_topology.NTU17_TO_MP15 {NTU17_TO_MP15.tolist()} does not match the mapping {expected}"
+            )
     except ValueError as e:
         print(f"Error in joint mapping: {e}")
         return
@@ -138,12 +149,16 @@ def main():
         print(f"No .npy files found in {ntu17_dir}")
         return
 
-    print(f"Found {len(original_npy_files)} .npy files to process.")
+    print(f"Found {len(original_npy_files)} .npy files.")
+
+    # Journal of completed/failed files, so an interrupted run can be resumed.
+    journal = RunJournal(output_mp15_dir)
+    original_npy_files = journal.select(original_npy_files, resume=args.resume, retry_failed=args.retry_failed)
+    print(f"{len(original_npy_files)} files to process.")
 
-    num_cores_to_use = args.num_cores if args.num_cores else os.cpu_count()
-    if num_cores_to_use is None: # os.cpu_count() might return None
-        num_cores_to_use = 1
-        print("Could not determine CPU count, defaulting to 1 core.")
+    num_cores_to_use = args.num_cores
+    if num_cores_to_use is None:
+        print(f"Autotuning worker count (up to {os.cpu_count()} cores).")
     else:
         print(f"Using {num_cores_to_use} CPU cores for conversion.")
 
@@ -153,20 +168,29 @@ def main():
     conversion_errors = 0
     successful_conversions = 0
 
-    # Using multiprocessing.Pool
+    # AdaptiveExecutor picks the worker count from measured throughput (unless
+    # --num_cores is given) and only admits a file while its estimated memory
+    # (file size x learned factor) fits in the available RAM.
     # The `with` statement ensures the pool is properly closed.
-    with multiprocessing.Pool(processes=num_cores_to_use) as pool:
-        # Use tqdm with pool.imap_unordered for progress bar with multiprocessing
-        # imap_unordered is good for tasks that don't need to maintain order and might finish at different times.
-        results = list(tqdm(pool.imap_unordered(worker_process_file, tasks), total=len(tasks), desc="Converting files"))
-
-    for input_path, success, error_msg in results:
-        if success:
-            successful_conversions += 1
-        else:
-            conversion_errors += 1
-            print(f"Failed to process {input_path.name}: {error_msg}")
-            
+    # Outcomes are journaled as they arrive (progress flushed in batches).
+    failures = []
+    with journal, AdaptiveExecutor(workers=num_cores_to_use) as exe:
+        for (file_path, _), result, err in tqdm(exe.imap(worker_process_file, tasks), total=len(tasks), desc="Converting files"):
+            input_path, success, error_msg = result if err is None else (file_path, False, f"Worker error: {err}")
+            if success:
+                successful_conversions += 1
+                journal.mark_done(input_path, output_mp15_dir / input_path.name)
+            else:
+                conversion_errors += 1
+                journal.mark_failed(input_path, error_msg)
+                failures.append((input_path, error_msg))
+        print(f"Settled on {exe.concurrency} workers.")
+
+    for input_path, error_msg in failures:
+        print(f"Failed to process {input_path.name}: {error_msg}")
+    if failures:
+        print(f"Failures are logged to {journal.errors_path}; re-run with --retry_failed to retry them.")
+
     print(f"\nConversion complete.")
     print(f"Successfully converted: {successful_conversions} files.")
     print(f"Errors/Skipped: {conversion_errors} files.")
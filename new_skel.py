@@ -1,26 +1,7 @@
 import matplotlib.pyplot as plt
 
-# Define the skeleton order and rows
-MP15_SKELETON_ORDER = [
-    "Head", "L_Shoulder", "R_Shoulder", "L_Elbow", "R_Elbow", "L_Wrist", "R_Wrist",
-    "L_Hip", "R_Hip", "L_Knee", "R_Knee", "L_Ankle", "R_Ankle", "L_Foot", "R_Foot"
-]
-N_JOINTS_MP15 = 15
-ROW_MP15 = {name: i for i, name in enumerate(MP15_SKELETON_ORDER)}
-
-# Define the skeletal edges
-skeletal_edges_mp15 = [
-    (ROW_MP15["Head"], ROW_MP15["L_Shoulder"]), (ROW_MP15["Head"], ROW_MP15["R_Shoulder"]),
-    (ROW_MP15["L_Shoulder"], ROW_MP15["R_Shoulder"]),
-    (ROW_MP15["L_Shoulder"], ROW_MP15["L_Hip"]), (ROW_MP15["R_Shoulder"], ROW_MP15["R_Hip"]),
-    (ROW_MP15["L_Hip"], ROW_MP15["R_Hip"]),
-    (ROW_MP15["L_Shoulder"], ROW_MP15["L_Elbow"]), (ROW_MP15["L_Elbow"], ROW_MP15["L_Wrist"]),
-    (ROW_MP15["R_Shoulder"], ROW_MP15["R_Elbow"]), (ROW_MP15["R_Elbow"], ROW_MP15["R_Wrist"]),
-    (ROW_MP15["L_Hip"], ROW_MP15["L_Knee"]), (ROW_MP15["L_Knee"], ROW_MP15["L_Ankle"]),
-    (ROW_MP15["L_Ankle"], ROW_MP15["L_Foot"]),
-    (ROW_MP15["R_Hip"], ROW_MP15["R_Knee"]), (ROW_MP15["R_Knee"], ROW_MP15["R_Ankle"]),
-    (ROW_MP15["R_Ankle"], ROW_MP15["R_Foot"]),
-]
+from constants_mp15 import ROW_MP15
+from skeleton_topology import MP15_EDGES as skeletal_edges_mp15
 
 # Define positions for each joint to represent a human skeleton
 pos = {
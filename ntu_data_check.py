@@ -1,10 +1,12 @@
 #!/usr/bin/env python3
 import os
 import sys
-from concurrent.futures import ProcessPoolExecutor, as_completed
 
-# joints to check
-JOINT_IDS = [3, 8, 4, 20, 5, 9, 10, 7, 16, 0, 12, 17, 13, 19, 18, 14, 15]
+from adaptive_pool import AdaptiveExecutor
+from skeleton_topology import NTU25_TO_NTU17
+
+# joints to check: the 17 raw NTU joints kept by convert2npy
+JOINT_IDS = frozenset(NTU25_TO_NTU17.tolist())
 
 def file_passes(path):
     """
@@ -44,11 +46,9 @@ def main(input_dir, output_file):
     valid = []
 
     # Use all available CPU cores
-    with ProcessPoolExecutor() as exe:
-        futures = {exe.submit(file_passes, p): p for p in all_files}
-        for i, fut in enumerate(as_completed(futures), 1):
-            path = futures[fut]
-            if fut.result():
+    with AdaptiveExecutor(workers=os.cpu_count()) as exe:
+        for i, (path, passed, _) in enumerate(exe.imap(file_passes, all_files), 1):
+            if passed:
                 valid.append(path)
             # progress update every 1000 files
             if i % 1000 == 0:
@@ -60,8 +60,12 @@ def main(input_dir, output_file):
 
     print(f"\n✅ Scanned {total} files, found {len(valid)} valid → {output_file}")
 
-if __name__ == "__main__":
-    if len(sys.argv) != 3:
+def cli(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if len(argv) != 2:
         print("Usage: python parallel_filter.py <input_dir> <output_file>")
         sys.exit(1)
-    main(sys.argv[1], sys.argv[2])
+    main(argv[0], argv[1])
+
+if __name__ == "__main__":
+    cli()
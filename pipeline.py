@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+pipeline.py
+
+One entry point for the data-preparation steps:
+
+    check   <input_dir> <output_file>      filter raw .skeleton files   (ntu_data_check)
+    convert <list_file> <out_dir> [...]    .skeleton → (T,17,3) .npy    (convert2npy)
+    mp15    --ntu17_dir ... [...]          NTU17 .npy → MP15 .npy       (convert_data_to_mp15)
+    angles  [--src_root ...] [...]         xyz .npy → cos/sin angles    (00_convert_raw_dir_to_angles)
+    screen  --data_dir ... [...]           bone/motion quality scores   (quality_screen)
+    view    <clip_dir_or_pack> [...]       interactive clip viewer      (clip_viewer)
+
+Arguments after the subcommand are passed to that script unchanged; use
+`pipeline.py <cmd> -h` for its options.
+
+Start-up is kept short: only argparse/importlib are loaded here and the step
+module is imported after the subcommand is known.  Workers are started from a
+fork server that preloads numpy (scipy for `angles`) and the step module once
+per run, rather than each spawned worker re-importing them; --start_method
+overrides this.
+
+Usage:
+    python pipeline.py convert good_valid_list.txt converted_skeleton_npy --resume
+"""
+import argparse
+import importlib
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+# subcommand -> (module, entry point, modules the fork server should preload)
+COMMANDS = {
+    "check":   ("ntu_data_check", "cli", ("numpy",)),
+    "convert": ("convert2npy", "cli", ("numpy",)),
+    "mp15":    ("convert_data_to_mp15", "main", ("numpy",)),
+    "angles":  ("00_convert_raw_dir_to_angles", "main", ("numpy", "scipy.signal")),
+    "screen":  ("quality_screen", "main", ("numpy",)),
+    "view":    ("clip_viewer", "main", ()),
+}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument(
+        "--start_method", choices=["forkserver", "fork", "spawn", "default"], default="forkserver",
+        help="How pool workers are started (default: forkserver where available)."
+    )
+    parser.add_argument("command", choices=sorted(COMMANDS))
+    parser.add_argument("args", nargs=argparse.REMAINDER, help="arguments for the subcommand")
+    args = parser.parse_args(argv)
+
+    module_name, entry, preload = COMMANDS[args.command]
+
+    if args.start_method == "forkserver":
+        import adaptive_pool
+        # the step module itself is preloaded too, so workers start with it imported
+        adaptive_pool.use_forkserver(preload + (module_name,))
+    elif args.start_method != "default":
+        import multiprocessing
+        import adaptive_pool
+        adaptive_pool.DEFAULT_MP_CONTEXT = multiprocessing.get_context(args.start_method)
+
+    module = importlib.import_module(module_name)
+    return getattr(module, entry)(args.args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,222 @@
+#!/usr/bin/env python3
+"""
+quality_screen.py
+
+Score converted clips ((T,17,3) NTU17 or (T,15,3) MP15 .npy files) for
+tracking glitches that ntu_data_check.file_passes cannot see, because it only
+looks at the Kinect tracking flags:
+
+  bone_dev_p95 / bone_dev_max   per-frame worst |bone length - clip median|
+                                relative to the median (limbs stretching)
+  vel_spike_frac / vel_spikes   fraction / number of frame steps where some
+                                joint moves more than VEL_SPIKE body scales
+                                (teleports)
+  acc_spike_frac / acc_spikes   same for the 2nd difference (jitter)
+  frozen_frac / longest_frozen  frames in runs of >= MIN_FROZEN_RUN steps in
+                                which no joint moves (stuck tracker)
+  missing_frac / longest_missing  all-zero frames / longest run of them
+
+Body scale is the mean median bone length, so the thresholds do not depend
+on the units (mm, m) of the clip.  All kernels are gathers over the arrays in
+skeleton_topology, applied to whole frame blocks of a memory-mapped clip, and
+clips are screened in parallel with AdaptiveExecutor.
+
+Scores (lower is better) are merged into a CSV clip index keyed by path;
+--max_score additionally writes the paths of passing clips to a list file.
+
+Usage:
+    python quality_screen.py --data_dir converted_skeleton_npy --index clip_index.csv \\
+        --max_score 0.5 --keep_list screened_list.txt
+"""
+import argparse
+import csv
+import os
+from pathlib import Path
+
+import numpy as np
+
+from adaptive_pool import AdaptiveExecutor
+from run_journal import atomic_path
+from skeleton_topology import get_topology, bone_lengths
+
+# Frames per block read from the memory-mapped clip.
+CHUNK_FRAMES = 8192
+# Thresholds, in body scales (per frame step).
+VEL_SPIKE = 0.5
+ACC_SPIKE = 0.3
+FREEZE_EPS = 1e-4
+MIN_FROZEN_RUN = 5
+# score = bone_dev_p95 + SPIKE_WEIGHT * (vel + acc spike fractions)
+#         + SPIKE_EVENT_WEIGHT * (vel + acc spike counts)
+#         + max(0, bone_dev_max - BONE_DEV_MAX_OK)
+#         + frozen_frac + missing_frac
+#         + RUN_WEIGHT * max(0, longest frozen / missing run - MIN_FROZEN_RUN)
+# The count, bone_dev_max and run terms do not shrink with clip length, so a
+# single teleport or a long dropout still fails a long clip.
+SPIKE_WEIGHT = 10.0
+SPIKE_EVENT_WEIGHT = 0.25
+BONE_DEV_MAX_OK = 0.5
+RUN_WEIGHT = 1 / 60                 # ≈ 0.5 per second of dropout at 30 fps
+
+METRICS = [
+    "n_frames", "bone_dev_p95", "bone_dev_max", "vel_spike_frac", "vel_spikes",
+    "acc_spike_frac", "acc_spikes", "frozen_frac", "longest_frozen", "missing_frac",
+    "longest_missing", "score",
+]
+
+
+def _runs(mask):
+    """Lengths of the runs of True in a 1-D boolean array."""
+    edges = np.diff(np.concatenate(([0], mask.astype(np.int8), [0])))
+    return np.flatnonzero(edges == -1) - np.flatnonzero(edges == 1)
+
+
+def screen_clip(path, chunk_frames=CHUNK_FRAMES):
+    """Return a dict with the METRICS of one clip."""
+    x = np.load(path, mmap_mode='r')
+    if x.ndim != 3 or x.shape[2] != 3 or x.shape[0] < 3:
+        raise ValueError(f"Unexpected shape {x.shape}")
+    skel = get_topology(x.shape[1])
+    n_frames = x.shape[0]
+
+    lengths = np.empty((n_frames, len(skel.edges)), dtype=np.float32)
+    missing = np.empty(n_frames, dtype=bool)
+    step = np.zeros(n_frames, dtype=np.float32)     # max joint move into frame t
+    accel = np.zeros(n_frames, dtype=np.float32)    # max joint 2nd diff at frame t
+
+    for start in range(0, n_frames, chunk_frames):
+        stop = min(start + chunk_frames, n_frames)
+        lo = max(0, start - 2)                      # 2-frame halo for the diffs
+        blk = np.asarray(x[lo:stop], dtype=np.float32)
+        lengths[start:stop] = bone_lengths(blk[start - lo:], skel)
+        missing[start:stop] = ~blk[start - lo:].any(axis=(1, 2))
+        d = np.diff(blk, axis=0)
+        step[lo + 1:stop] = np.linalg.norm(d, axis=-1).max(axis=1)
+        accel[lo + 1:stop - 1] = np.linalg.norm(np.diff(d, axis=0), axis=-1).max(axis=1)
+
+    valid = ~missing
+    missing_runs = _runs(missing)
+    res = {"n_frames": n_frames, "missing_frac": float(missing.mean()),
+           "longest_missing": int(missing_runs.max()) if missing_runs.size else 0}
+    if valid.sum() < 3:
+        res.update(bone_dev_p95=np.inf, bone_dev_max=np.inf, vel_spike_frac=0.0, vel_spikes=0,
+                   acc_spike_frac=0.0, acc_spikes=0, frozen_frac=0.0, longest_frozen=0, score=np.inf)
+        return res
+
+    med = np.median(lengths[valid], axis=0)
+    scale = max(float(med.mean()), 1e-8)
+    # worst bone per frame: averaging over bones hides a single stretched limb
+    dev = (np.abs(lengths[valid] - med) / np.maximum(med, 1e-8)).max(axis=1)
+
+    # only judge motion between frames that are actually tracked
+    pair = valid[1:] & valid[:-1]
+    triple = pair[1:] & pair[:-1]
+    step_n = step[1:][pair] / scale
+    accel_n = accel[1:-1][triple] / scale
+    frozen = np.zeros(n_frames - 1, dtype=bool)
+    frozen[pair] = step_n < FREEZE_EPS
+    runs = _runs(frozen)
+    long_runs = runs[runs >= MIN_FROZEN_RUN]
+
+    vel_spikes = int((step_n > VEL_SPIKE).sum())
+    acc_spikes = int((accel_n > ACC_SPIKE).sum())
+    res.update(
+        bone_dev_p95=float(np.percentile(dev, 95)),
+        bone_dev_max=float(dev.max()),
+        vel_spike_frac=vel_spikes / step_n.size if step_n.size else 0.0,
+        vel_spikes=vel_spikes,
+        acc_spike_frac=acc_spikes / accel_n.size if accel_n.size else 0.0,
+        acc_spikes=acc_spikes,
+        frozen_frac=float(long_runs.sum() / (n_frames - 1)),
+        longest_frozen=int(runs.max()) if runs.size else 0,
+    )
+    res["score"] = (res["bone_dev_p95"]
+                    + SPIKE_WEIGHT * (res["vel_spike_frac"] + res["acc_spike_frac"])
+                    + SPIKE_EVENT_WEIGHT * (vel_spikes + acc_spikes)
+                    + max(0.0, res["bone_dev_max"] - BONE_DEV_MAX_OK)
+                    + res["frozen_frac"] + res["missing_frac"]
+                    + RUN_WEIGHT * (max(0, res["longest_frozen"] - MIN_FROZEN_RUN)
+                                    + max(0, res["longest_missing"] - MIN_FROZEN_RUN)))
+    return res
+
+
+def read_index(index_path):
+    """Existing clip index as {path: row}, empty if there is none."""
+    if not os.path.exists(index_path):
+        return {}, ["path"]
+    with open(index_path, 'r', newline='') as f:
+        reader = csv.DictReader(f)
+        return {row["path"]: row for row in reader}, list(reader.fieldnames or ["path"])
+
+
+def write_index(index_path, rows, fieldnames):
+    with atomic_path(index_path) as tmp:
+        with open(tmp, 'w', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=fieldnames, restval='')
+            writer.writeheader()
+            for key in sorted(rows):
+                writer.writerow(rows[key])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Score converted skeleton clips for bone-length, velocity/acceleration and frozen-frame glitches."
+    )
+    parser.add_argument(
+        "--data_dir", type=str, required=True, help="Directory containing converted (T, 17|15, 3) .npy clips."
+    )
+    parser.add_argument(
+        "--index", type=str, default=None, help="CSV clip index to create/update. Defaults to <data_dir>/clip_index.csv."
+    )
+    parser.add_argument(
+        "--max_score", type=float, default=None, help="Keep clips with score <= this value (lower is better)."
+    )
+    parser.add_argument(
+        "--keep_list", type=str, default=None, help="Write the paths of kept clips here (requires --max_score)."
+    )
+    parser.add_argument(
+        "--num_cores", type=int, default=None, help="Number of CPU cores to use. Defaults to autotuning."
+    )
+    args = parser.parse_args(argv)
+
+    data_dir = Path(args.data_dir)
+    index_path = args.index or str(data_dir / "clip_index.csv")
+    files = sorted(data_dir.glob("*.npy"))
+    if not files:
+        print(f"No .npy files found in {data_dir}")
+        return
+    print(f"Screening {len(files)} clips…")
+
+    rows, fieldnames = read_index(index_path)
+    fieldnames += [m for m in METRICS if m not in fieldnames]
+    n_errors = 0
+    scored = []                     # clips scored in this run
+    with AdaptiveExecutor(workers=args.num_cores) as exe:
+        for i, (path, metrics, err) in enumerate(exe.imap(screen_clip, files), 1):
+            row = rows.setdefault(str(path), {"path": str(path)})
+            if err is not None:
+                n_errors += 1
+                print(f"[ERROR] {path}: {err}")
+                # drop stale metrics so the old score cannot pass a filter
+                row.update({k: "" for k in METRICS})
+                continue
+            scored.append(str(path))
+            row.update({k: (f"{v:.6g}" if isinstance(v, float) else v) for k, v in metrics.items()})
+            if i % 1000 == 0:
+                print(f"Screened {i}/{len(files)} clips…", end='\r')
+
+    write_index(index_path, rows, fieldnames)
+    print(f"\nScored {len(files) - n_errors} clips ({n_errors} errors) → {index_path}")
+
+    if args.max_score is not None:
+        # only clips screened successfully in this run; other index rows may be stale
+        kept = [p for p in sorted(scored) if float(rows[p]["score"]) <= args.max_score]
+        print(f"{len(kept)}/{len(scored)} clips have score <= {args.max_score}")
+        if args.keep_list:
+            with open(args.keep_list, 'w') as out:
+                out.write('\n'.join(kept))
+            print(f"Kept clips → {args.keep_list}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+"""
+run_journal.py
+
+Crash-safe bookkeeping for the conversion scripts.
+
+  * atomic_save / atomic_path: outputs are written to "<name>.tmp" and
+    renamed into place, so a killed worker never leaves a half-written .npy.
+  * RunJournal: append-only progress journal (progress.jsonl) and structured
+    error log (errors.jsonl) in the output directory.  Clips are keyed by
+    their resolved path and outputs are recorded relative to the output
+    directory.  Progress is flushed in batches; a crash loses at most one
+    batch, and those clips are simply redone on resume because their outputs
+    were written atomically.  Every record carries a timestamp ("ts"), so
+    when a clip appears in both logs its latest outcome wins.
+
+Selecting what to run:
+    resume        → skip clips already in the journal whose output exists
+    retry_failed  → run only clips whose last recorded outcome is a failure
+"""
+import json
+import os
+import time
+from contextlib import contextmanager
+
+import numpy as np
+
+PROGRESS_FILE = 'progress.jsonl'
+ERRORS_FILE = 'errors.jsonl'
+TMP_SUFFIX = '.tmp'
+
+
+@contextmanager
+def atomic_path(path):
+    """
+    Yield a temporary path next to `path`; rename it onto `path` if the block
+    succeeds, delete it otherwise.
+    """
+    path = os.fspath(path)
+    tmp = path + TMP_SUFFIX
+    try:
+        yield tmp
+        os.replace(tmp, path)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+
+
+def atomic_save(path, arr):
+    """np.save(path, arr) via a temp file + rename."""
+    with atomic_path(path) as tmp:
+        with open(tmp, 'wb') as f:
+            np.save(f, arr)
+            f.flush()
+            os.fsync(f.fileno())
+
+
+def _key(src):
+    """Journal key of a source clip: its resolved absolute path."""
+    return os.path.realpath(os.fspath(src))
+
+
+def _read_jsonl(path):
+    if not os.path.exists(path):
+        return []
+    records = []
+    with open(path, 'r') as f:
+        for line in f:
+            try:
+                records.append(json.loads(line))
+            except ValueError:
+                continue            # torn line from a crash
+    return records
+
+
+class RunJournal:
+    """
+    Progress journal + error log for one output directory.
+
+    Use as a context manager so the last batch is flushed on exit (also when
+    the run is interrupted with an exception).
+    """
+
+    def __init__(self, out_dir, flush_every=200):
+        self.out_dir = os.fspath(out_dir)
+        self.progress_path = os.path.join(self.out_dir, PROGRESS_FILE)
+        self.errors_path = os.path.join(self.out_dir, ERRORS_FILE)
+        self.flush_every = flush_every
+        self._done = {}             # src -> output path
+        done_ts = {}
+        for rec in _read_jsonl(self.progress_path):
+            self._done[rec['src']] = rec.get('out')
+            done_ts[rec['src']] = rec.get('ts', 0)
+        self._failed = {}           # src -> last error record
+        for rec in _read_jsonl(self.errors_path):
+            self._failed[rec['src']] = rec
+        # the later record wins; on a tie (old records without "ts") done wins
+        for src in list(self._failed):
+            if src not in self._done:
+                continue
+            if done_ts[src] >= self._failed[src].get('ts', 0):
+                del self._failed[src]
+            else:
+                del self._done[src]
+        self._buffer = []
+        self._remove_stale_tmp()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.flush()
+
+    def _remove_stale_tmp(self):
+        if not os.path.isdir(self.out_dir):
+            return
+        for fn in os.listdir(self.out_dir):
+            if fn.endswith(TMP_SUFFIX):
+                os.remove(os.path.join(self.out_dir, fn))
+
+    # -- queries ------------------------------------------------------------
+
+    def is_done(self, src):
+        out = self._done.get(_key(src))
+        return out is not None and os.path.exists(os.path.join(self.out_dir, out))
+
+    def failed(self):
+        """Clips whose last recorded outcome is a failure."""
+        return set(self._failed)
+
+    def select(self, paths, resume=False, retry_failed=False):
+        """Filter `paths` according to the resume / retry-failed mode."""
+        if retry_failed:
+            failed = self.failed()
+            return [p for p in paths if _key(p) in failed]
+        if resume:
+            return [p for p in paths if not self.is_done(p)]
+        return list(paths)
+
+    # -- updates ------------------------------------------------------------
+
+    def mark_done(self, src, out):
+        # outputs are stored relative to out_dir, so the journal stays valid
+        # when the run is resumed from another working directory
+        src, out = _key(src), os.path.relpath(os.fspath(out), self.out_dir)
+        self._done[src] = out
+        self._failed.pop(src, None)
+        self._buffer.append(json.dumps({'src': src, 'out': out, 'ts': time.time()}))
+        if len(self._buffer) >= self.flush_every:
+            self.flush()
+
+    def mark_failed(self, src, error):
+        """Record a failure immediately (errors are rare, don't batch them)."""
+        rec = {
+            'src': _key(src),
+            'error': str(error),
+            'type': type(error).__name__ if isinstance(error, BaseException) else 'Error',
+            'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'ts': time.time(),
+        }
+        self._failed[rec['src']] = rec
+        self._done.pop(rec['src'], None)
+        with open(self.errors_path, 'a') as f:
+            f.write(json.dumps(rec) + '\n')
+
+    def flush(self):
+        if not self._buffer:
+            return
+        with open(self.progress_path, 'a') as f:
+            f.write('\n'.join(self._buffer) + '\n')
+            f.flush()
+            os.fsync(f.fileno())
+        self._buffer = []
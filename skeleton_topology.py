@@ -0,0 +1,163 @@
+# skeleton_topology.py
+
+"""
+Single source of truth for skeleton connectivity, built on constants_ntu and
+constants_mp15.
+
+Everything is precomputed as NumPy index arrays so kernels are pure gathers:
+
+    bone_lengths(x, MP15)       -> (..., n_bones)
+    joint_angles(x, MP15)       -> (..., n_angles)  radians
+    mirror(x, MP15)             -> x with L/R swapped and the x axis flipped
+
+Only numpy and the two constants modules are imported, so this is cheap to
+import in worker processes (no matplotlib/scipy).
+"""
+
+from typing import NamedTuple
+
+import numpy as np
+
+from constants_ntu import NTU_17_JOINTS_ORDER, ROW_NTU
+from constants_mp15 import MP15_SKELETON_ORDER, ROW_MP15
+
+# --- Raw NTU .skeleton files (25 Kinect v2 joints) ---
+N_JOINTS_NTU25 = 25
+
+# NTU17[i] = NTU25[NTU25_TO_NTU17[i]]
+NTU25_TO_NTU17 = np.array([
+     0,   # SpineBase
+    20,   # SpineShoulder
+     3,   # Head
+     4,   # ShoulderLeft
+     5,   # ElbowLeft
+     7,   # HandLeft
+     8,   # ShoulderRight
+     9,   # ElbowRight
+    10,   # WristRight
+    12,   # HipLeft
+    13,   # KneeLeft
+    14,   # AnkleLeft
+    15,   # FootLeft
+    16,   # HipRight
+    17,   # KneeRight
+    18,   # AnkleRight
+    19,   # FootRight
+], dtype=np.intp)
+
+# MP15[i] = NTU17[NTU17_TO_MP15[i]]  (joints are matched by name)
+NTU17_TO_MP15 = np.array([ROW_NTU[name] for name in MP15_SKELETON_ORDER], dtype=np.intp)
+
+
+class Skeleton(NamedTuple):
+    name: str
+    joints: tuple           # joint names, in array order
+    row: dict               # joint name -> index
+    edges: np.ndarray       # (n_bones, 2) parent, child
+    bone_parents: np.ndarray
+    bone_children: np.ndarray
+    angle_triplets: np.ndarray  # (n_angles, 3) a, vertex, c
+    mirror_perm: np.ndarray     # joint i <- joint mirror_perm[i] after L/R swap
+
+    @property
+    def n_joints(self):
+        return len(self.joints)
+
+
+def _mirror_perm(joints, row):
+    def swap(name):
+        if name.startswith('L_'):
+            return 'R_' + name[2:]
+        if name.startswith('R_'):
+            return 'L_' + name[2:]
+        return name
+    return np.array([row[swap(name)] for name in joints], dtype=np.intp)
+
+
+def _build(name, joints, row, edge_names, triplet_names):
+    edges = np.array([(row[a], row[b]) for a, b in edge_names], dtype=np.intp)
+    triplets = np.array([tuple(row[j] for j in t) for t in triplet_names], dtype=np.intp)
+    for arr in (edges, triplets):
+        arr.setflags(write=False)
+    perm = _mirror_perm(joints, row)
+    perm.setflags(write=False)
+    return Skeleton(name, tuple(joints), dict(row), edges,
+                    edges[:, 0], edges[:, 1], triplets, perm)
+
+
+_LIMB_EDGES = [
+    ("L_Shoulder", "L_Elbow"), ("L_Elbow", "L_Wrist"),
+    ("R_Shoulder", "R_Elbow"), ("R_Elbow", "R_Wrist"),
+    ("L_Hip", "L_Knee"), ("L_Knee", "L_Ankle"), ("L_Ankle", "L_Foot"),
+    ("R_Hip", "R_Knee"), ("R_Knee", "R_Ankle"), ("R_Ankle", "R_Foot"),
+]
+
+MP15_EDGE_NAMES = [
+    ("Head", "L_Shoulder"), ("Head", "R_Shoulder"),
+    ("L_Shoulder", "R_Shoulder"),
+    ("L_Shoulder", "L_Hip"), ("R_Shoulder", "R_Hip"),
+    ("L_Hip", "R_Hip"),
+] + _LIMB_EDGES
+
+NTU17_EDGE_NAMES = [
+    ("NTU_SpineBase", "NTU_SpineShoulder"), ("NTU_SpineShoulder", "Head"),
+    ("NTU_SpineShoulder", "L_Shoulder"), ("NTU_SpineShoulder", "R_Shoulder"),
+    ("NTU_SpineBase", "L_Hip"), ("NTU_SpineBase", "R_Hip"),
+] + _LIMB_EDGES
+
+# (a, vertex, c): the angle at `vertex` between vertex->a and vertex->c.
+ANGLE_TRIPLET_NAMES = [
+    ("L_Shoulder", "L_Elbow", "L_Wrist"), ("R_Shoulder", "R_Elbow", "R_Wrist"),
+    ("L_Elbow", "L_Shoulder", "L_Hip"), ("R_Elbow", "R_Shoulder", "R_Hip"),
+    ("L_Elbow", "L_Shoulder", "R_Shoulder"), ("R_Elbow", "R_Shoulder", "L_Shoulder"),
+    ("L_Shoulder", "L_Hip", "L_Knee"), ("R_Shoulder", "R_Hip", "R_Knee"),
+    ("R_Hip", "L_Hip", "L_Knee"), ("L_Hip", "R_Hip", "R_Knee"),
+    ("L_Hip", "L_Knee", "L_Ankle"), ("R_Hip", "R_Knee", "R_Ankle"),
+    ("L_Knee", "L_Ankle", "L_Foot"), ("R_Knee", "R_Ankle", "R_Foot"),
+    ("Head", "L_Shoulder", "R_Shoulder"), ("Head", "R_Shoulder", "L_Shoulder"),
+]
+
+MP15 = _build("mp15", MP15_SKELETON_ORDER, ROW_MP15, MP15_EDGE_NAMES, ANGLE_TRIPLET_NAMES)
+NTU17 = _build("ntu17", NTU_17_JOINTS_ORDER, ROW_NTU, NTU17_EDGE_NAMES, ANGLE_TRIPLET_NAMES)
+
+TOPOLOGIES = {skel.name: skel for skel in (MP15, NTU17)}
+
+# Plain (i, j) tuples for plotting code
+MP15_EDGES = [tuple(e) for e in MP15.edges.tolist()]
+NTU17_EDGES = [tuple(e) for e in NTU17.edges.tolist()]
+
+
+def get_topology(key):
+    """Look up a skeleton by name ('mp15', 'ntu17') or by joint count."""
+    if isinstance(key, str):
+        return TOPOLOGIES[key.lower()]
+    for skel in TOPOLOGIES.values():
+        if skel.n_joints == key:
+            return skel
+    raise KeyError(f"No skeleton topology with {key} joints")
+
+
+# --- Gather kernels: x has shape (..., n_joints, 3) ---
+
+def bone_vectors(x, skel):
+    return x[..., skel.bone_children, :] - x[..., skel.bone_parents, :]
+
+
+def bone_lengths(x, skel):
+    return np.linalg.norm(bone_vectors(x, skel), axis=-1)
+
+
+def joint_angles(x, skel, eps=1e-8):
+    a = x[..., skel.angle_triplets[:, 0], :]
+    v = x[..., skel.angle_triplets[:, 1], :]
+    c = x[..., skel.angle_triplets[:, 2], :]
+    u, w = a - v, c - v
+    cos = np.sum(u * w, axis=-1) / (np.linalg.norm(u, axis=-1) * np.linalg.norm(w, axis=-1) + eps)
+    return np.arccos(np.clip(cos, -1.0, 1.0))
+
+
+def mirror(x, skel, axis=0):
+    """Swap left/right joints and negate coordinate `axis`."""
+    out = x[..., skel.mirror_perm, :].copy()
+    out[..., axis] *= -1
+    return out
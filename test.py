@@ -3,6 +3,8 @@ import matplotlib.pyplot as plt
 from mpl_toolkits.mplot3d import Axes3D
 from matplotlib.animation import FuncAnimation
 
+from skeleton_topology import NTU17_EDGES
+
 # ---------------------------------------------------------
 # 1) Load Data
 # ---------------------------------------------------------
@@ -16,13 +18,7 @@ print(np.max(data), np.min(data))  # check value range
 # ---------------------------------------------------------
 # 2) Skeleton connectivity
 # ---------------------------------------------------------
-skeletal_edges = [
-    (0,1), (1,2),
-    (1,3), (3,4), (4,5),
-    (1,6), (6,7), (7,8),
-    (0,9), (9,10), (10,11), (11,12),
-    (0,13), (13,14), (14,15), (15,16)
-]
+skeletal_edges = NTU17_EDGES
 
 # ---------------------------------------------------------
 # 3) Setup Figure and Axes
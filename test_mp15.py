@@ -33,18 +33,8 @@ except NameError: # __file__ is not defined (e.g. in interactive interpreter)
     pass
 
 
-# Attempt to import MP15 constants
-try:
-    from constants_mp15 import MP15_SKELETON_ORDER, ROW_MP15, N_JOINTS_MP15
-    print(f"Successfully imported MP15 constants from src.utils. Using {N_JOINTS_MP15} joints.")
-except ImportError as e:
-    print(f"Warning: Could not import MP15 constants from src.utils (Error: {e}). Using fallback definitions.")
-    MP15_SKELETON_ORDER = [ # Fallback definition
-        "Head", "L_Shoulder", "R_Shoulder", "L_Elbow", "R_Elbow", "L_Wrist", "R_Wrist",
-        "L_Hip", "R_Hip", "L_Knee", "R_Knee", "L_Ankle", "R_Ankle", "L_Foot", "R_Foot"
-    ]
-    N_JOINTS_MP15 = 15
-    ROW_MP15 = {name: i for i, name in enumerate(MP15_SKELETON_ORDER)}
+from constants_mp15 import N_JOINTS_MP15
+from skeleton_topology import MP15_EDGES
 
 # ---------------------------------------------------------
 # 1) Load Data
@@ -77,18 +67,7 @@ print("Value range: min =", np.min(data), "max =", np.max(data)) # Min/Max from
 # ---------------------------------------------------------
 # 2) Skeleton connectivity for MP15
 # ---------------------------------------------------------
-skeletal_edges_mp15 = [
-    (ROW_MP15["Head"], ROW_MP15["L_Shoulder"]), (ROW_MP15["Head"], ROW_MP15["R_Shoulder"]),
-    (ROW_MP15["L_Shoulder"], ROW_MP15["R_Shoulder"]),
-    (ROW_MP15["L_Shoulder"], ROW_MP15["L_Hip"]), (ROW_MP15["R_Shoulder"], ROW_MP15["R_Hip"]),
-    (ROW_MP15["L_Hip"], ROW_MP15["R_Hip"]),
-    (ROW_MP15["L_Shoulder"], ROW_MP15["L_Elbow"]), (ROW_MP15["L_Elbow"], ROW_MP15["L_Wrist"]),
-    (ROW_MP15["R_Shoulder"], ROW_MP15["R_Elbow"]), (ROW_MP15["R_Elbow"], ROW_MP15["R_Wrist"]),
-    (ROW_MP15["L_Hip"], ROW_MP15["L_Knee"]), (ROW_MP15["L_Knee"], ROW_MP15["L_Ankle"]),
-    (ROW_MP15["L_Ankle"], ROW_MP15["L_Foot"]),
-    (ROW_MP15["R_Hip"], ROW_MP15["R_Knee"]), (ROW_MP15["R_Knee"], ROW_MP15["R_Ankle"]),
-    (ROW_MP15["R_Ankle"], ROW_MP15["R_Foot"]),
-]
+skeletal_edges_mp15 = MP15_EDGES
 
 # ---------------------------------------------------------
 # 3) Setup Figure and Axes